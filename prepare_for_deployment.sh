@@ -52,8 +52,7 @@ if [ ! -d "organized_docs" ]; then
 fi
 
 # Create deployment directory
-echo "Creating clean deployment structure..."
-rm -rf deployment
+echo "Updating deployment structure..."
 mkdir -p deployment
 
 # Check which directory to use as source
@@ -66,8 +65,9 @@ if [ ! -d "$source_dir" ]; then
     fi
 fi
 
-# Copy documentation
-cp -r $source_dir deployment/docs
+# Sync documentation, copying only files that changed since the last run
+python scripts/sync_docs.py "$source_dir" deployment/docs --index deployment/structure.md \
+    --manifest .deployment_sync_manifest.json
 cp -f README.md deployment/ 2>/dev/null || true
 
 # Create README.md if it doesn't exist in deployment directory
@@ -104,8 +104,10 @@ echo
 if confirm "${YELLOW}Step 2: Would you like to initialize a Git repository in the deployment directory?${NC}"; then
     cd deployment
     
-    echo "Initializing git repository..."
-    git init
+    if [ ! -d ".git" ]; then
+        echo "Initializing git repository..."
+        git init
+    fi
     
     echo "Adding files to staging..."
     git add .
@@ -115,7 +117,7 @@ if confirm "${YELLOW}Step 2: Would you like to initialize a Git repository in th
     commit_msg=${commit_msg:-"Initial documentation deployment"}
     
     echo "Creating commit..."
-    git commit -m "$commit_msg"
+    git commit -m "$commit_msg" || echo "No changes to commit."
     
     # GitHub repository
     if confirm "Would you like to add a remote GitHub repository?"; then
@@ -123,6 +125,7 @@ if confirm "${YELLOW}Step 2: Would you like to initialize a Git repository in th
         
         if [ -n "$repo_url" ]; then
             echo "Adding remote repository..."
+            git remote remove origin 2>/dev/null || true
             git remote add origin "$repo_url"
             
             if confirm "Would you like to push to GitHub now?"; then
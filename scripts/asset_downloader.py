@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Asset downloader for making scraped documentation self-contained.
+
+Downloads images and attachments referenced in markdown files, stores each
+one once under assets/ named by its content hash, and rewrites the markdown
+links to relative paths. A URL index kept in assets/ lets later runs skip
+URLs that were already stored.
+"""
+import os
+import re
+import json
+import hashlib
+import argparse
+import logging
+import mimetypes
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+from tqdm import tqdm
+
+from utils import (
+    get_session,
+    setup_directory,
+    find_markdown_files,
+    MARKDOWN_LINK_RE,
+    ASSETS_DIRNAME
+)
+from output_writer import atomic_write
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# Linked files with these extensions are treated as attachments
+ATTACHMENT_EXTENSIONS = (
+    '.pdf', '.zip', '.gz', '.tar', '.csv', '.xls', '.xlsx', '.doc', '.docx',
+    '.ppt', '.pptx', '.txt', '.json', '.xml', '.mp3', '.mp4', '.webm'
+)
+
+CHUNK_SIZE = 64 * 1024
+
+# Maps asset URLs to stored file names across runs; hidden so it is not deployed
+URL_INDEX_FILENAME = '.url_index.json'
+
+def is_asset_link(is_image, url):
+    """Check if a markdown link points to an image or downloadable attachment."""
+    if is_image:
+        return True
+    return urlparse(url).path.lower().endswith(ATTACHMENT_EXTENSIONS)
+
+def extract_asset_urls(markdown):
+    """Return the set of asset URLs referenced in markdown content."""
+    return {
+        match.group(3)
+        for match in MARKDOWN_LINK_RE.finditer(markdown)
+        if is_asset_link(match.group(1) == '!', match.group(3))
+    }
+
+def guess_extension(url, content_type=None):
+    """Guess a file extension for an asset from its URL or content type."""
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if ext and re.fullmatch(r'\.[a-z0-9]{1,5}', ext):
+        return ext
+    if content_type:
+        guessed = mimetypes.guess_extension(content_type.split(';')[0].strip())
+        if guessed:
+            return guessed
+    return ''
+
+def load_stored_assets(output_dir):
+    """Return the URL-to-path mapping of assets stored by earlier runs whose files still exist."""
+    assets_dir = os.path.join(output_dir, ASSETS_DIRNAME)
+    index_path = os.path.join(assets_dir, URL_INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable asset index {index_path}: {str(e)}")
+        return {}
+    paths = {url: os.path.join(assets_dir, name) for url, name in index.items()}
+    return {url: path for url, path in paths.items() if os.path.exists(path)}
+
+class AssetDownloader:
+    """
+    Downloads assets concurrently with its own worker and byte limits.
+    Each URL is fetched at most once, and identical content is stored once.
+    """
+
+    def __init__(self, output_dir, workers=4, max_bytes=500 * 1024 * 1024,
+                 max_asset_bytes=25 * 1024 * 1024):
+        self.assets_dir = setup_directory(os.path.join(output_dir, ASSETS_DIRNAME))
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.max_asset_bytes = max_asset_bytes
+        self.bytes_downloaded = 0
+        self.budget_exhausted = False
+        self.index_path = os.path.join(self.assets_dir, URL_INDEX_FILENAME)
+        self.url_to_path = load_stored_assets(output_dir)
+        self._lock = threading.Lock()
+
+    def save_index(self):
+        """Persist the URLs that were stored, so later runs do not fetch them again."""
+        index = {url: os.path.basename(path) for url, path in self.url_to_path.items() if path}
+        atomic_write(self.index_path, json.dumps(index, indent=1, sort_keys=True))
+
+    def _reserve(self, num_bytes):
+        """Reserve bytes from the shared budget. Returns False if they do not fit."""
+        with self._lock:
+            if self.bytes_downloaded + num_bytes > self.max_bytes:
+                # Only give up on later assets once nothing is left
+                self.budget_exhausted = self.bytes_downloaded >= self.max_bytes
+                return False
+            self.bytes_downloaded += num_bytes
+            return True
+
+    def _release(self, num_bytes):
+        """Return bytes reserved for a download that was dropped."""
+        with self._lock:
+            self.bytes_downloaded -= num_bytes
+            self.budget_exhausted = self.bytes_downloaded >= self.max_bytes
+
+    def _remaining(self):
+        """Return the bytes left in the shared budget."""
+        with self._lock:
+            return self.max_bytes - self.bytes_downloaded
+
+    def fetch_asset(self, url):
+        """
+        Download a single asset into the content-addressed store.
+        Returns the stored file path, or None if skipped or failed.
+        """
+        if self.budget_exhausted:
+            return None
+
+        tmp_path = None
+        reserved = 0
+        stored = False
+        try:
+            with get_session().get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+
+                declared = int(response.headers.get('Content-Length') or 0)
+                if declared > self.max_asset_bytes:
+                    logger.warning(f"Skipping asset over size limit: {url}")
+                    return None
+                if declared > self._remaining():
+                    logger.warning(f"Skipping asset larger than remaining byte budget: {url}")
+                    return None
+
+                hasher = hashlib.sha256()
+                size = 0
+                fd, tmp_path = tempfile.mkstemp(dir=self.assets_dir, suffix='.part')
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_asset_bytes:
+                            logger.warning(f"Skipping asset over size limit: {url}")
+                            return None
+                        if not self._reserve(len(chunk)):
+                            logger.warning(f"Asset does not fit in remaining byte budget, skipping: {url}")
+                            return None
+                        reserved += len(chunk)
+                        hasher.update(chunk)
+                        f.write(chunk)
+
+                ext = guess_extension(url, response.headers.get('Content-Type'))
+
+            final_path = os.path.join(self.assets_dir, hasher.hexdigest() + ext)
+            if os.path.exists(final_path):
+                # Same content already stored from another URL
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, final_path)
+            tmp_path = None
+            stored = True
+            return final_path
+
+        except Exception as e:
+            logger.error(f"Error fetching asset {url}: {str(e)}")
+            return None
+
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            # Dropped downloads do not count against the budget
+            if not stored and reserved:
+                self._release(reserved)
+
+    def download_all(self, urls):
+        """
+        Download all URLs not fetched yet, in this run or an earlier one.
+        Returns the URL-to-path mapping.
+        """
+        pending = [url for url in urls if url not in self.url_to_path]
+        if len(pending) < len(urls):
+            logger.info(f"Skipping {len(urls) - len(pending)} assets already stored")
+        if not pending:
+            return self.url_to_path
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            future_to_url = {
+                executor.submit(self.fetch_asset, url): url
+                for url in pending
+            }
+            for future in tqdm(
+                as_completed(future_to_url),
+                desc=f"Downloading assets with {self.workers} workers",
+                total=len(future_to_url)
+            ):
+                url = future_to_url[future]
+                self.url_to_path[url] = future.result()
+
+        self.save_index()
+        return self.url_to_path
+
+def rewrite_asset_links(markdown, file_path, url_to_path):
+    """Replace downloaded asset URLs in markdown with paths relative to file_path."""
+    file_dir = os.path.dirname(os.path.abspath(file_path))
+
+    def replace(match):
+        bang, text, url = match.groups()
+        asset_path = url_to_path.get(url)
+        if not asset_path or not is_asset_link(bang == '!', url):
+            return match.group(0)
+        rel_path = os.path.relpath(os.path.abspath(asset_path), file_dir)
+        return f"{bang}[{text}]({rel_path.replace(os.sep, '/')})"
+
+    return MARKDOWN_LINK_RE.sub(replace, markdown)
+
+def stored_asset_rewriter(output_dir):
+    """
+    Return a function that applies the asset links of earlier runs to markdown.
+    Lets the writer's --only-changed check compare fresh conversions with
+    pages whose asset links were already localized.
+    """
+    url_to_path = load_stored_assets(output_dir)
+    return lambda markdown, file_path: rewrite_asset_links(markdown, file_path, url_to_path)
+
+def localize_assets(markdown_files, output_dir, workers=4,
+                    max_bytes=500 * 1024 * 1024, max_asset_bytes=25 * 1024 * 1024):
+    """
+    Download assets referenced by markdown_files into output_dir/assets
+    and rewrite the links. Only files whose links change are rewritten.
+    """
+    # Collect unique asset URLs across all pages
+    urls = set()
+    for file_path in markdown_files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            urls.update(extract_asset_urls(f.read()))
+    logger.info(f"Found {len(urls)} unique assets in {len(markdown_files)} files")
+
+    downloader = AssetDownloader(output_dir, workers, max_bytes, max_asset_bytes)
+    url_to_path = downloader.download_all(urls)
+
+    # Rewrite links in files that reference downloaded assets
+    rewritten = 0
+    for file_path in markdown_files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            markdown = f.read()
+        updated = rewrite_asset_links(markdown, file_path, url_to_path)
+        if updated != markdown:
+            atomic_write(file_path, updated)
+            rewritten += 1
+
+    stored = sum(1 for url in urls if url_to_path.get(url))
+    logger.info(
+        f"Assets: {stored}/{len(urls)} stored "
+        f"({downloader.bytes_downloaded / (1024 * 1024):.1f} MB downloaded), "
+        f"{rewritten} files rewritten"
+    )
+    return {
+        'assets': len(urls),
+        'downloaded': stored,
+        'bytes': downloader.bytes_downloaded,
+        'files_rewritten': rewritten
+    }
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Download images and attachments referenced in markdown files')
+    parser.add_argument('docs_dir', help='Directory containing markdown documents')
+    parser.add_argument('--workers', type=int, default=4, help='Number of parallel asset downloads')
+    parser.add_argument('--max-mb', type=float, default=500, help='Total download budget in MB')
+    parser.add_argument('--max-asset-mb', type=float, default=25, help='Maximum size of a single asset in MB')
+
+    args = parser.parse_args()
+
+    logger.info(f"Starting asset download for: {args.docs_dir}")
+    localize_assets(
+        find_markdown_files(args.docs_dir),
+        args.docs_dir,
+        args.workers,
+        int(args.max_mb * 1024 * 1024),
+        int(args.max_asset_mb * 1024 * 1024)
+    )
+    logger.info("Asset download completed")
+
+if __name__ == "__main__":
+    main()
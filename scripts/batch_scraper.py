@@ -3,6 +3,7 @@
 Batch scraper for parallel processing of multiple URLs.
 """
 import os
+import time
 import argparse
 import pandas as pd
 import logging
@@ -11,11 +12,14 @@ from tqdm import tqdm
 
 from utils import (
     setup_directory,
-    clean_filename,
-    fetch_url,
-    html_to_markdown,
-    save_markdown
+    fetch_response,
+    parse_html,
+    convert_page
 )
+from asset_downloader import localize_assets, stored_asset_rewriter
+from capture_archive import ArchiveWriter
+from profiling import NullProfiler, add_profile_arguments, profiler_from_args
+from output_writer import MarkdownWriter, add_writer_arguments, writer_from_args
 
 # Set up logging
 logging.basicConfig(
@@ -25,47 +29,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def process_url(url, output_dir, delay=1):
+def process_url(url, writer, delay=1, archive=None, profiler=None):
     """Process a single URL and save as markdown."""
+    profiler = profiler or NullProfiler()
     try:
-        # Fetch content
-        soup, response = fetch_url(url, delay)
-        if not soup:
-            logger.error(f"Failed to process {url}")
-            return {
-                'url': url,
-                'file': None,
-                'status': 'failed',
-                'error': 'Failed to fetch content'
-            }
-        
-        # Extract title for filename if available
-        title = None
-        if soup.title:
-            title = soup.title.string
-        
-        # Generate filename
-        filename = clean_filename(url, title)
-        
-        # Convert to markdown
-        from urllib.parse import urlparse
-        base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-        markdown_content = html_to_markdown(soup, base_url)
-        
-        # Add source URL at the top of the markdown content
-        if markdown_content.startswith('# '):
-            # If content starts with a title, insert after the title
-            lines = markdown_content.split('\n', 1)
-            if len(lines) > 1:
-                markdown_content = f"{lines[0]}\n\n> **Source**: [{url}]({url})\n\n{lines[1]}"
-            else:
-                markdown_content = f"{lines[0]}\n\n> **Source**: [{url}]({url})"
-        else:
-            # Insert at the beginning
-            markdown_content = f"> **Source**: [{url}]({url})\n\n{markdown_content}"
-        
-        # Save to file
-        filepath = save_markdown(markdown_content, output_dir, filename)
+        with profiler.page(url) as page:
+            time.sleep(delay)  # Be respectful to servers
+            
+            # Fetch content
+            with page.stage('fetch'):
+                response = fetch_response(url)
+            if response is None:
+                logger.error(f"Failed to process {url}")
+                return {
+                    'url': url,
+                    'file': None,
+                    'status': 'failed',
+                    'error': 'Failed to fetch content'
+                }
+            
+            # Keep the raw response for offline reconversion
+            if archive:
+                archive.write_response(url, response)
+            
+            # Decode once; the HTML is kept for profiling captures
+            with page.stage('parse'):
+                html = response.text
+                soup = parse_html(html)
+            page.html = html
+            
+            # Convert to markdown
+            with page.stage('html_to_markdown'):
+                filename, markdown_content = convert_page(url, soup)
+            
+            # Save to file
+            with page.stage('save_markdown'):
+                filepath = writer.save(url, markdown_content, filename)
         
         return {
             'url': url,
@@ -83,10 +82,11 @@ def process_url(url, output_dir, delay=1):
             'error': str(e)
         }
 
-def batch_process(urls, output_dir, delay=1, workers=5):
+def batch_process(urls, output_dir, delay=1, workers=5, archive=None, profiler=None, writer=None):
     """Process multiple URLs in parallel."""
     # Create output directory
     setup_directory(output_dir)
+    writer = writer or MarkdownWriter(output_dir)
     
     results = []
     
@@ -94,7 +94,7 @@ def batch_process(urls, output_dir, delay=1, workers=5):
     with ThreadPoolExecutor(max_workers=workers) as executor:
         # Submit all tasks
         future_to_url = {
-            executor.submit(process_url, url, output_dir, delay): url 
+            executor.submit(process_url, url, writer, delay, archive, profiler): url 
             for url in urls
         }
         
@@ -117,9 +117,10 @@ def batch_process(urls, output_dir, delay=1, workers=5):
                     'error': str(e)
                 })
     
-    return results
+    # Files renamed after a name collision are reported under their final path
+    return writer.update_results(results)
 
-def process_csv(csv_path, output_dir, delay=1, column_name='url', workers=5):
+def process_csv(csv_path, output_dir, delay=1, column_name='url', workers=5, archive=None, profiler=None, writer=None):
     """Process all URLs in a CSV file using parallel workers."""
     # Read CSV
     try:
@@ -150,7 +151,7 @@ def process_csv(csv_path, output_dir, delay=1, column_name='url', workers=5):
     logger.info(f"Found {len(urls)} unique URLs to process")
     
     # Batch process URLs
-    results = batch_process(urls, output_dir, delay, workers)
+    results = batch_process(urls, output_dir, delay, workers, archive, profiler, writer)
     
     # Save results
     results_df = pd.DataFrame(results)
@@ -172,11 +173,34 @@ def main():
     parser.add_argument('--delay', type=float, default=1, help='Delay between requests in seconds')
     parser.add_argument('--column', default='url', help='Column name in CSV that contains URLs')
     parser.add_argument('--workers', type=int, default=5, help='Number of parallel workers')
+    parser.add_argument('--archive', help='Directory to store raw responses for offline reconversion')
+    parser.add_argument('--assets', action='store_true', help='Download images and attachments into the output directory')
+    parser.add_argument('--asset-workers', type=int, default=4, help='Number of parallel asset downloads')
+    parser.add_argument('--asset-max-mb', type=float, default=500, help='Total asset download budget in MB')
+    add_profile_arguments(parser)
+    add_writer_arguments(parser)
     
     args = parser.parse_args()
     
     logger.info(f"Starting batch scraper with CSV: {args.csv_path}")
-    process_csv(args.csv_path, args.output, args.delay, args.column, args.workers)
+    archive = ArchiveWriter(args.archive) if args.archive else None
+    profiler = profiler_from_args(args)
+    writer = writer_from_args(args)
+    if args.assets:
+        # Pages on disk already point at local assets, compare them that way
+        writer.compare_transform = stored_asset_rewriter(args.output)
+    try:
+        results_df = process_csv(args.csv_path, args.output, args.delay, args.column, args.workers, archive, profiler, writer)
+    finally:
+        writer.close()
+        if archive:
+            archive.close()
+        if profiler:
+            profiler.finish()
+    
+    if args.assets and results_df is not None:
+        files = results_df['file'].dropna().tolist()
+        localize_assets(files, args.output, args.asset_workers, int(args.asset_max_mb * 1024 * 1024))
     logger.info("Batch scraping completed")
 
 if __name__ == "__main__":
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Append-only archive of raw HTTP responses.
+
+Each response is stored as a WARC-style record compressed as its own gzip
+member, so any record can be read back by seeking to its offset. An
+index.csv next to the archive files maps every URL to its file and offset.
+"""
+import os
+import csv
+import gzip
+import threading
+from datetime import datetime, timezone
+from requests.structures import CaseInsensitiveDict
+
+ARCHIVE_PREFIX = 'capture-'
+ARCHIVE_SUFFIX = '.warc.gz'
+INDEX_FILENAME = 'index.csv'
+INDEX_FIELDS = ['url', 'file', 'offset', 'length', 'status', 'date']
+
+# Start a new archive file once the current one reaches this size
+MAX_ARCHIVE_BYTES = 1024 * 1024 * 1024
+
+# Headers that describe the transfer rather than the stored body
+TRANSFER_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+def build_record(url, status, reason, headers, body, date=None):
+    """Build a WARC-style response record from its parts."""
+    date = date or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    http_lines = [f"HTTP/1.1 {status} {reason or ''}".rstrip()]
+    for name, value in headers.items():
+        if name.lower() not in TRANSFER_HEADERS:
+            http_lines.append(f"{name}: {value}")
+    http_lines.append(f"Content-Length: {len(body)}")
+    payload = ('\r\n'.join(http_lines) + '\r\n\r\n').encode('utf-8') + body
+
+    warc_header = (
+        "WARC/1.0\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"WARC-Date: {date}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "\r\n"
+    ).encode('utf-8')
+
+    return warc_header + payload + b'\r\n\r\n', date
+
+def _read_headers(stream):
+    """Read header lines up to a blank line. Returns the lines, or None at EOF."""
+    lines = []
+    while True:
+        line = stream.readline()
+        if not line:
+            return None if not lines else lines
+        line = line.decode('utf-8', errors='replace').rstrip('\r\n')
+        if not line:
+            if lines:
+                return lines
+            continue
+        lines.append(line)
+
+def _parse_headers(lines):
+    """Parse 'Name: value' lines into a case-insensitive dict."""
+    headers = CaseInsensitiveDict()
+    for line in lines:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip()] = value.strip()
+    return headers
+
+def parse_record(stream):
+    """
+    Read one record from a decompressed stream.
+    Returns a dict with url, date, status, headers and body, or None at EOF.
+    """
+    warc_lines = _read_headers(stream)
+    if not warc_lines:
+        return None
+    warc_headers = _parse_headers(warc_lines[1:])
+    payload = stream.read(int(warc_headers.get('Content-Length', 0)))
+    stream.read(4)  # Record separator
+
+    head, _, body = payload.partition(b'\r\n\r\n')
+    http_lines = head.decode('utf-8', errors='replace').split('\r\n')
+    status_parts = http_lines[0].split(' ', 2)
+
+    return {
+        'url': warc_headers.get('WARC-Target-URI'),
+        'date': warc_headers.get('WARC-Date'),
+        'status': int(status_parts[1]) if len(status_parts) > 1 else 0,
+        'headers': _parse_headers(http_lines[1:]),
+        'body': body
+    }
+
+class ArchiveWriter:
+    """Thread-safe writer that appends responses to rotating archive files."""
+
+    def __init__(self, archive_dir, max_bytes=MAX_ARCHIVE_BYTES):
+        self.archive_dir = archive_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+
+        # Continue from the highest numbered file, even if earlier ones were removed
+        numbers = [
+            int(name[len(ARCHIVE_PREFIX):-len(ARCHIVE_SUFFIX)])
+            for name in list_archive_files(archive_dir)
+            if name[len(ARCHIVE_PREFIX):-len(ARCHIVE_SUFFIX)].isdigit()
+        ]
+        self._number = max(numbers, default=1)
+        self._file = None
+
+        index_path = os.path.join(archive_dir, INDEX_FILENAME)
+        new_index = not os.path.exists(index_path)
+        self._index_file = open(index_path, 'a', newline='', encoding='utf-8')
+        self._index = csv.DictWriter(self._index_file, fieldnames=INDEX_FIELDS)
+        if new_index:
+            self._index.writeheader()
+
+    def _current_file(self):
+        """Return the archive file to append to, rotating when it is full."""
+        if self._file and self._file.tell() >= self.max_bytes:
+            self._file.close()
+            self._file = None
+            self._number += 1
+        if self._file is None:
+            filename = f"{ARCHIVE_PREFIX}{self._number:05d}{ARCHIVE_SUFFIX}"
+            self._file = open(os.path.join(self.archive_dir, filename), 'ab')
+        return self._file
+
+    def write(self, url, status, reason, headers, body):
+        """Append a response record and its index entry."""
+        record, date = build_record(url, status, reason, headers, body)
+        compressed = gzip.compress(record)
+
+        with self._lock:
+            f = self._current_file()
+            offset = f.tell()
+            f.write(compressed)
+            f.flush()
+            self._index.writerow({
+                'url': url,
+                'file': os.path.basename(f.name),
+                'offset': offset,
+                'length': len(compressed),
+                'status': status,
+                'date': date
+            })
+            self._index_file.flush()
+
+    def write_response(self, url, response):
+        """Append a requests response, headers included."""
+        self.write(url, response.status_code, response.reason, response.headers, response.content)
+
+    def close(self):
+        """Close the current archive and index files."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            self._index_file.close()
+
+def list_archive_files(archive_dir):
+    """List archive files in the order they were written."""
+    return sorted(
+        f for f in os.listdir(archive_dir)
+        if f.startswith(ARCHIVE_PREFIX) and f.endswith(ARCHIVE_SUFFIX)
+    )
+
+def read_index(archive_dir, latest_only=True):
+    """
+    Read index entries, optionally keeping only the latest capture per URL.
+    Entries are returned sorted by file and offset for sequential reads.
+    """
+    with open(os.path.join(archive_dir, INDEX_FILENAME), 'r', newline='', encoding='utf-8') as f:
+        entries = list(csv.DictReader(f))
+
+    for entry in entries:
+        entry['offset'] = int(entry['offset'])
+        entry['length'] = int(entry['length'])
+
+    if latest_only:
+        entries = list({entry['url']: entry for entry in entries}.values())
+
+    return sorted(entries, key=lambda e: (e['file'], e['offset']))
+
+def read_record(f, offset):
+    """Read the record starting at offset in an open archive file."""
+    f.seek(offset)
+    return parse_record(gzip.GzipFile(fileobj=f, mode='rb'))
+
+def iter_records(archive_dir, latest_only=True):
+    """Stream records in archive order using the index."""
+    current_name = None
+    f = None
+    try:
+        for entry in read_index(archive_dir, latest_only):
+            if entry['file'] != current_name:
+                if f:
+                    f.close()
+                current_name = entry['file']
+                f = open(os.path.join(archive_dir, current_name), 'rb')
+            yield read_record(f, entry['offset'])
+    finally:
+        if f:
+            f.close()
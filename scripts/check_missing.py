@@ -9,7 +9,8 @@ import logging
 from urllib.parse import urlparse
 import re
 
-from utils import clean_filename
+from utils import clean_filename, find_markdown_files, read_source_url
+from link_rewriter import normalize_url
 
 # Set up logging
 logging.basicConfig(
@@ -39,13 +40,36 @@ def extract_url_pattern(url):
     pattern = re.sub(r'-+', '-', pattern)
     return pattern
 
-def find_matching_file(url, docs_dir):
+def build_file_index(docs_dir):
+    """
+    Index the markdown files anywhere under docs_dir.
+    Returns a mapping of normalized Source URLs to relative paths, and the
+    list of relative paths. Sharded, organized and renamed pages are found.
+    """
+    source_index = {}
+    rel_paths = []
+    for file_path in find_markdown_files(docs_dir):
+        rel_path = os.path.relpath(file_path, docs_dir)
+        rel_paths.append(rel_path)
+        url = read_source_url(file_path)
+        if url:
+            source_index.setdefault(normalize_url(url)[0], rel_path)
+    return source_index, rel_paths
+
+def find_matching_file(url, docs_dir, file_index=None):
     """Find a file that matches the URL in the docs directory."""
-    expected_filename = get_filename_from_url(url)
+    source_index, rel_paths = file_index or build_file_index(docs_dir)
     
-    # Direct match
-    if os.path.exists(os.path.join(docs_dir, expected_filename)):
-        return expected_filename
+    # Page whose Source header is this URL
+    matching_file = source_index.get(normalize_url(url)[0])
+    if matching_file:
+        return matching_file
+    
+    # Direct match on the expected file name, in any subdirectory
+    expected_filename = get_filename_from_url(url)
+    for rel_path in rel_paths:
+        if os.path.basename(rel_path) == expected_filename:
+            return rel_path
     
     # Try to find a file with similar name
     pattern = extract_url_pattern(url)
@@ -53,11 +77,10 @@ def find_matching_file(url, docs_dir):
         return None
     
     # Look for files that might be a match
-    for filename in os.listdir(docs_dir):
-        if filename.lower().endswith('.md'):
-            cleaned_name = re.sub(r'[^a-z0-9]', '-', filename.lower())
-            if pattern in cleaned_name:
-                return filename
+    for rel_path in rel_paths:
+        cleaned_name = re.sub(r'[^a-z0-9]', '-', os.path.basename(rel_path).lower())
+        if pattern in cleaned_name:
+            return rel_path
     
     return None
 
@@ -96,11 +119,12 @@ def check_missing_docs(csv_path, docs_dir, column_name='url'):
     logger.info(f"Found {len(urls)} unique URLs in CSV")
     
     # Check each URL
+    file_index = build_file_index(docs_dir)
     results = []
     missing_count = 0
     
     for url in urls:
-        matching_file = find_matching_file(url, docs_dir)
+        matching_file = find_matching_file(url, docs_dir, file_index)
         
         if matching_file:
             results.append({
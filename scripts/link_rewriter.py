@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Rewrite links between scraped pages to relative markdown paths.
+
+Builds a URL-to-file index, either from a scraping results CSV or from the
+Source header each page carries, then rewrites in-corpus links in a single
+parallel pass. Files whose links do not change are left untouched.
+"""
+import os
+import argparse
+import logging
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse, urlunparse
+from tqdm import tqdm
+
+from utils import (
+    find_markdown_files,
+    read_source_url,
+    MARKDOWN_LINK_RE,
+    SOURCE_RE
+)
+from output_writer import atomic_write
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+# URL-to-path index shared with worker processes
+_url_index = {}
+
+def normalize_url(url):
+    """
+    Normalize a URL for index lookups.
+    Returns the normalized URL without its fragment, and the fragment.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if netloc.endswith(DEFAULT_PORTS.get(scheme, '\0')):
+        netloc = netloc.rsplit(':', 1)[0]
+    path = parsed.path.rstrip('/') or '/'
+    normalized = urlunparse((scheme, netloc, path, '', parsed.query, ''))
+    return normalized, parsed.fragment
+
+def build_url_index(markdown_files, results_csv=None):
+    """
+    Map normalized URLs to absolute file paths.
+    Uses the results CSV when given, otherwise the pages' Source headers,
+    which also covers files moved by organize_docs.sh. CSV entries for
+    files that are not among markdown_files are dropped.
+    """
+    url_index = {}
+
+    if results_csv:
+        known_files = {os.path.abspath(file_path) for file_path in markdown_files}
+        df = pd.read_csv(results_csv)
+        df = df[df['status'] == 'success'].dropna(subset=['url', 'file'])
+        dropped = 0
+        for url, file_path in zip(df['url'], df['file']):
+            file_path = os.path.abspath(file_path)
+            if file_path in known_files:
+                url_index[normalize_url(url)[0]] = file_path
+            else:
+                dropped += 1
+        if dropped:
+            logger.warning(f"Ignored {dropped} results entries for files outside the docs directory")
+    else:
+        for file_path in markdown_files:
+            url = read_source_url(file_path)
+            if url:
+                url_index[normalize_url(url)[0]] = os.path.abspath(file_path)
+
+    return url_index
+
+def rewrite_links(markdown, file_path, url_index):
+    """Replace links to indexed URLs with paths relative to file_path."""
+    file_dir = os.path.dirname(os.path.abspath(file_path))
+
+    def replace(match):
+        bang, text, url = match.groups()
+        if bang:
+            return match.group(0)
+        normalized, fragment = normalize_url(url)
+        target = url_index.get(normalized)
+        if not target:
+            return match.group(0)
+        rel_path = os.path.relpath(target, file_dir).replace(os.sep, '/')
+        if fragment:
+            rel_path += f"#{fragment}"
+        return f"[{text}]({rel_path})"
+
+    # Keep the Source header pointing at the original page
+    lines = markdown.split('\n')
+    for i, line in enumerate(lines):
+        if not SOURCE_RE.match(line):
+            lines[i] = MARKDOWN_LINK_RE.sub(replace, line)
+    return '\n'.join(lines)
+
+def _init_worker(url_index):
+    """Install the URL index in a worker process."""
+    global _url_index
+    _url_index = url_index
+
+def rewrite_file(file_path):
+    """Rewrite links in one file. Returns True if the file changed."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        markdown = f.read()
+    updated = rewrite_links(markdown, file_path, _url_index)
+    if updated == markdown:
+        return False
+    atomic_write(file_path, updated)
+    return True
+
+def rewrite_docs(docs_dir, results_csv=None, workers=None):
+    """Rewrite in-corpus links for every markdown file under docs_dir."""
+    markdown_files = find_markdown_files(docs_dir)
+    url_index = build_url_index(markdown_files, results_csv)
+    logger.info(f"Indexed {len(url_index)} URLs across {len(markdown_files)} files")
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(markdown_files) // (workers * 8))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(url_index,)
+    ) as executor:
+        changed = sum(tqdm(
+            executor.map(rewrite_file, markdown_files, chunksize=chunksize),
+            desc=f"Rewriting links with {workers} processes",
+            total=len(markdown_files)
+        ))
+
+    logger.info(f"Rewrote links in {changed}/{len(markdown_files)} files")
+    return changed
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Rewrite links between scraped pages to relative paths')
+    parser.add_argument('docs_dir', help='Directory containing markdown documents')
+    parser.add_argument('--results', help='Scraping results CSV to build the URL index from (default: read Source headers)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of processes (default: CPU count)')
+
+    args = parser.parse_args()
+
+    logger.info(f"Starting link rewriting for: {args.docs_dir}")
+    rewrite_docs(args.docs_dir, args.results, args.workers)
+    logger.info("Link rewriting completed")
+
+if __name__ == "__main__":
+    main()
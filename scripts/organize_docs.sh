@@ -85,7 +85,11 @@ get_category() {
 
 # Process each markdown file
 process_files() {
-  for file in "$INPUT_DIR"/*.md; do
+  # Names already used in this run, so pages never overwrite each other
+  declare -A seen
+
+  # Include files in shard subdirectories, skipping downloaded assets
+  find "$INPUT_DIR" -type f -name "*.md" -not -path "*/assets/*" | sort | while read -r file; do
     if [ -f "$file" ]; then
       # Get basename
       filename=$(basename "$file")
@@ -97,8 +101,18 @@ process_files() {
       content=$(cat "$file")
       category=$(get_category "$clean_name" "$content")
       
-      # Copy to appropriate directory
-      cp "$file" "$OUTPUT_DIR/$category/$clean_name"
+      # Add a numeric suffix if another page already took this name
+      if [[ -n "${seen[$category/$clean_name]}" ]]; then
+        n=2
+        while [[ -n "${seen[$category/${clean_name%.md}-$n.md]}" ]]; do
+          n=$((n + 1))
+        done
+        clean_name="${clean_name%.md}-$n.md"
+      fi
+      seen[$category/$clean_name]=1
+      
+      # Copy to appropriate directory, pointing asset links at the copied assets/
+      sed -E 's#\]\((\.\./)*assets/#](../assets/#g' "$file" > "$OUTPUT_DIR/$category/$clean_name"
       
       echo "Processed: $filename -> $category/$clean_name"
     fi
@@ -195,8 +209,17 @@ create_main_readme() {
   done
 }
 
+# Copy downloaded images and attachments alongside the categories
+copy_assets() {
+  if [ -d "$INPUT_DIR/assets" ]; then
+    mkdir -p "$OUTPUT_DIR/assets"
+    cp -R "$INPUT_DIR/assets/." "$OUTPUT_DIR/assets/"
+  fi
+}
+
 # Main execution
 create_category_folders
+copy_assets
 process_files
 update_readme_files
 create_main_readme
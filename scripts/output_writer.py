@@ -0,0 +1,224 @@
+"""
+Markdown output writer for large corpora.
+
+Gives every URL its own file name, writes through temp files with atomic
+renames, can shard output into subdirectories, batches fsyncs, and can
+skip writing pages whose content has not changed.
+"""
+import os
+import re
+import hashlib
+import tempfile
+import threading
+import logging
+from urllib.parse import urlparse
+
+from utils import setup_directory, find_markdown_files, read_source_url
+
+logger = logging.getLogger(__name__)
+
+SHARD_MODES = ['none', 'hash', 'path']
+
+# Saves of the same file name are serialized on one of these locks
+NAME_LOCK_STRIPES = 64
+
+# Temp files are created private, so give them the usual permissions
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+def url_hash(url):
+    """Return a stable hash of a URL."""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+def shard_dir(url, mode):
+    """Return the subdirectory a URL's file belongs in for a shard mode."""
+    if mode == 'hash':
+        return url_hash(url)[:2]
+    if mode == 'path':
+        parts = urlparse(url).path.strip('/').split('/')[:-1]
+        parts = [re.sub(r'[^\w\-]+', '-', part).strip('-').lower() for part in parts]
+        return os.path.join(*[part for part in parts if part]) if any(parts) else ''
+    return ''
+
+def atomic_write(file_path, content):
+    """Write content to a temp file next to file_path and rename it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def fsync_dir(dir_path):
+    """Flush a directory entry to disk where the platform supports it."""
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class MarkdownWriter:
+    """
+    Thread-safe writer for scraped markdown files.
+
+    File names are unique across the whole output tree, not just within a
+    shard directory, so flattening the tree cannot overwrite pages. When
+    two URLs produce the same file name, in this run or against a file
+    already on disk, every one of them gets a name with a short hash of its
+    URL appended. Files already saved under the plain name are renamed, so
+    the names only depend on the set of URLs and not on the order they
+    finish in. Use path_for or update_results for a URL's final path, or
+    set on_rename to a callable taking (url, new_path) to hear of renames.
+
+    Files only appear once fully written. With fsync_batch set, written
+    files and their directories are flushed to disk in batches.
+    """
+
+    def __init__(self, output_dir, shard='none', only_changed=False, fsync_batch=0):
+        self.output_dir = setup_directory(output_dir)
+        self.shard = shard
+        self.only_changed = only_changed
+        self.fsync_batch = fsync_batch
+        self.written = 0
+        self.unchanged = 0
+        self._claims = {}
+        self._paths = {}
+        self.on_rename = None
+        # Applied to new content before the only_changed comparison
+        self.compare_transform = None
+        self._existing = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._name_locks = [threading.Lock() for _ in range(NAME_LOCK_STRIPES)]
+
+    def _existing_paths(self, filename):
+        """Return the files already on disk with this name, in any subdirectory."""
+        with self._lock:
+            if self._existing is None:
+                self._existing = {}
+                for file_path in find_markdown_files(self.output_dir):
+                    self._existing.setdefault(os.path.basename(file_path), []).append(file_path)
+        return self._existing.get(filename, [])
+
+    def resolve_path(self, url, filename):
+        """
+        Return the unique output path for a URL.
+        Must be called holding the name lock for filename.
+        """
+        directory = os.path.join(self.output_dir, shard_dir(url, self.shard))
+        stem, ext = os.path.splitext(filename)
+        hashed_path = os.path.join(directory, f"{stem}-{url_hash(url)[:8]}{ext}")
+
+        owners = self._claims.setdefault(filename, {})
+        if url in owners:
+            return owners[url]
+        for file_path in self._existing_paths(filename):
+            if os.path.exists(file_path):
+                owner = read_source_url(file_path)
+                if owner and owner != url and owner not in owners:
+                    owners[owner] = file_path
+
+        if owners or os.path.exists(hashed_path):
+            # A shared name: move anyone still on the plain name to a hashed one
+            for owner, owner_path in list(owners.items()):
+                if os.path.basename(owner_path) == filename:
+                    renamed = os.path.join(
+                        os.path.dirname(owner_path), f"{stem}-{url_hash(owner)[:8]}{ext}"
+                    )
+                    if os.path.exists(owner_path):
+                        os.replace(owner_path, renamed)
+                        logger.info(f"Renamed: {owner_path} -> {renamed}")
+                        with self._lock:
+                            self._pending = [renamed if p == owner_path else p for p in self._pending]
+                    owners[owner] = renamed
+                    self._paths[owner] = renamed
+                    if self.on_rename:
+                        self.on_rename(owner, renamed)
+            file_path = hashed_path
+        else:
+            file_path = os.path.join(directory, filename)
+
+        owners[url] = file_path
+        self._paths[url] = file_path
+        return file_path
+
+    def path_for(self, url, default=None):
+        """Return the current path of a URL saved in this run."""
+        return self._paths.get(url, default)
+
+    def update_results(self, results):
+        """Point result rows at their files' final paths after any renames."""
+        for result in results:
+            if result.get('file'):
+                result['file'] = self.path_for(result['url'], result['file'])
+        return results
+
+    def save(self, url, content, filename):
+        """Save markdown content for a URL. Returns the file path."""
+        with self._name_locks[hash(filename) % NAME_LOCK_STRIPES]:
+            file_path = self.resolve_path(url, filename)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+            if self.only_changed and os.path.exists(file_path):
+                expected = content
+                if self.compare_transform:
+                    expected = self.compare_transform(content, file_path)
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    if f.read() == expected:
+                        with self._lock:
+                            self.unchanged += 1
+                        return file_path
+
+            atomic_write(file_path, content)
+
+        with self._lock:
+            self.written += 1
+            if self.fsync_batch:
+                self._pending.append(file_path)
+                if len(self._pending) >= self.fsync_batch:
+                    self._sync_pending()
+
+        logger.info(f"Saved: {file_path}")
+        return file_path
+
+    def _sync_pending(self):
+        """fsync the pending files and their directories in one batch."""
+        for file_path in self._pending:
+            try:
+                with open(file_path, 'rb') as f:
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logger.warning(f"Could not fsync {file_path}: {str(e)}")
+        for dir_path in {os.path.dirname(p) for p in self._pending}:
+            fsync_dir(dir_path)
+        self._pending = []
+
+    def close(self):
+        """Flush outstanding fsyncs and log a summary."""
+        with self._lock:
+            if self._pending:
+                self._sync_pending()
+        if self.only_changed:
+            logger.info(f"Writer: {self.written} files written, {self.unchanged} unchanged")
+
+def add_writer_arguments(parser):
+    """Add the output writer options to a scraper's argument parser."""
+    parser.add_argument('--shard', choices=SHARD_MODES, default='none',
+                        help='Split output into subdirectories by URL hash or URL path')
+    parser.add_argument('--only-changed', action='store_true', help='Skip writing pages whose content has not changed')
+    parser.add_argument('--fsync-batch', type=int, default=0,
+                        help='fsync written files in batches of this size (default: no fsync)')
+
+def writer_from_args(args):
+    """Create a writer from parsed arguments."""
+    return MarkdownWriter(args.output, args.shard, args.only_changed, args.fsync_batch)
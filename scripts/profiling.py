@@ -0,0 +1,278 @@
+"""
+Profiling hooks for the scrapers.
+
+Times the fetch, parse, html_to_markdown and save_markdown stages of every
+page, collects cProfile and tracemalloc data for a sample of pages, and keeps
+the raw HTML of the slowest pages and of pages over a time or memory
+threshold so they can be replayed later.
+"""
+import os
+import json
+import time
+import heapq
+import random
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import logging
+from contextlib import contextmanager, nullcontext
+
+from utils import setup_directory, clean_filename
+
+logger = logging.getLogger(__name__)
+
+STAGES = ['fetch', 'parse', 'html_to_markdown', 'save_markdown']
+
+# Allocations made by the profilers themselves are left out of snapshots
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+]
+
+class PageProfile:
+    """Timings and captured data for a single page."""
+
+    def __init__(self, url):
+        self.url = url
+        self.timings = {}
+        self.html = None
+        self.peak_memory = None
+        self.profiled = False
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+    @contextmanager
+    def stage(self, name):
+        """Time a processing stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - start
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'total_time': self.total_time,
+            'timings': self.timings,
+            'peak_memory': self.peak_memory,
+            'profiled': self.profiled
+        }
+
+class NullPageProfile:
+    """Stand-in used when profiling is disabled."""
+
+    html = None
+
+    def stage(self, name):
+        return nullcontext()
+
+class NullProfiler:
+    """Profiler that records nothing."""
+
+    def page(self, url):
+        return nullcontext(NullPageProfile())
+
+    def finish(self):
+        pass
+
+class Profiler:
+    """
+    Collects stage timings for every page and sampled cProfile/tracemalloc data.
+    A sampled page runs alone: it waits for pages in progress to finish and
+    other workers wait for it. tracemalloc counts every thread, and from
+    Python 3.12 cProfile does too, so this is what lets the data be
+    attributed to the page. tracemalloc only runs during sampled pages, so
+    the others are timed without tracing overhead.
+    """
+
+    def __init__(self, profile_dir, sample_rate=0.1, slowest=20,
+                 time_threshold=None, memory_threshold=None):
+        self.profile_dir = setup_directory(profile_dir)
+        self.pages_dir = os.path.join(profile_dir, 'pages')
+        self.sample_rate = sample_rate
+        self.slowest = slowest
+        self.time_threshold = time_threshold
+        self.memory_threshold = memory_threshold
+
+        self.stage_times = {stage: [] for stage in STAGES}
+        self.page_count = 0
+        self.captured = 0
+        self._slowest_heap = []
+        self._stats = None
+        self._peak_memory = 0
+        self._peak_snapshot = None
+        self._lock = threading.Lock()
+        self._turns = threading.Condition()
+        self._active = 0
+        self._sampling = False
+        self._started = time.time()
+
+    def _begin(self, sample):
+        """Wait for a turn to process a page. Returns True if it is sampled."""
+        with self._turns:
+            if sample and not self._sampling:
+                # Hold off new pages, then wait for the running ones to finish
+                self._sampling = True
+                self._turns.wait_for(lambda: self._active == 0)
+                return True
+            self._turns.wait_for(lambda: not self._sampling)
+            self._active += 1
+            return False
+
+    def _end(self, sampled):
+        """Give up a page's turn."""
+        with self._turns:
+            if sampled:
+                self._sampling = False
+            else:
+                self._active -= 1
+            self._turns.notify_all()
+
+    @contextmanager
+    def page(self, url):
+        """Profile the processing of one page."""
+        page = PageProfile(url)
+        sampled = self._begin(random.random() < self.sample_rate)
+        profile = None
+
+        if sampled:
+            page.profiled = True
+            tracemalloc.start()
+            profile = cProfile.Profile()
+            profile.enable()
+
+        try:
+            yield page
+        finally:
+            if sampled:
+                profile.disable()
+                page.peak_memory = tracemalloc.get_traced_memory()[1]
+                if page.peak_memory > self._peak_memory:
+                    # Page objects are still alive here, so the snapshot shows them
+                    self._peak_memory = page.peak_memory
+                    self._peak_snapshot = (url, tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS))
+                tracemalloc.stop()
+            self._end(sampled)
+            self._record(page, profile)
+
+    def _record(self, page, profile):
+        """Add a finished page to the aggregate data."""
+        over_threshold = (
+            (self.time_threshold is not None and page.total_time > self.time_threshold) or
+            (self.memory_threshold is not None and page.peak_memory is not None and
+             page.peak_memory > self.memory_threshold)
+        )
+
+        with self._lock:
+            self.page_count += 1
+            for stage, seconds in page.timings.items():
+                self.stage_times.setdefault(stage, []).append(seconds)
+
+            if profile is not None:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+
+            if over_threshold:
+                self._capture(page, 'threshold')
+
+            # Keep the slowest pages, with their HTML, in a min-heap
+            entry = (page.total_time, self.page_count, page)
+            if len(self._slowest_heap) < self.slowest:
+                heapq.heappush(self._slowest_heap, entry)
+            elif self._slowest_heap and entry[0] > self._slowest_heap[0][0]:
+                heapq.heapreplace(self._slowest_heap, entry)
+
+    def _capture(self, page, reason):
+        """Write a page's raw HTML and timings to the pages directory."""
+        setup_directory(self.pages_dir)
+        self.captured += 1
+        name = f"{reason}-{self.captured:04d}-{clean_filename(page.url)[:-3]}"
+        if page.html is not None:
+            with open(os.path.join(self.pages_dir, name + '.html'), 'w', encoding='utf-8') as f:
+                f.write(page.html)
+        with open(os.path.join(self.pages_dir, name + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(page.to_dict(), f, indent=2)
+
+    def finish(self):
+        """Write the pstats file, captured pages and summary report."""
+        slowest = sorted(self._slowest_heap, reverse=True)
+        for _, _, page in slowest:
+            self._capture(page, 'slowest')
+
+        stats_path = os.path.join(self.profile_dir, 'profile.pstats')
+        if self._stats is not None:
+            self._stats.dump_stats(stats_path)
+
+        summary_path = os.path.join(self.profile_dir, 'summary.txt')
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(self._summary(slowest))
+
+        logger.info(f"Profile written to {self.profile_dir}")
+
+    def _summary(self, slowest):
+        """Build the text summary report."""
+        lines = [
+            "Profile Summary",
+            "===============",
+            "",
+            f"Pages: {self.page_count}",
+            f"Wall time: {time.time() - self._started:.1f}s",
+            "",
+            f"{'Stage':<18}{'Count':>8}{'Total s':>10}{'Mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'Max ms':>10}",
+        ]
+        for stage, times in self.stage_times.items():
+            if not times:
+                continue
+            ordered = sorted(times)
+            lines.append(
+                f"{stage:<18}{len(times):>8}{sum(times):>10.2f}"
+                f"{sum(times) / len(times) * 1000:>10.1f}"
+                f"{ordered[len(ordered) // 2] * 1000:>10.1f}"
+                f"{ordered[int(len(ordered) * 0.95)] * 1000:>10.1f}"
+                f"{ordered[-1] * 1000:>10.1f}"
+            )
+
+        lines += ["", f"Slowest {len(slowest)} pages:"]
+        for total, _, page in slowest:
+            stages = ', '.join(f"{stage}={seconds * 1000:.0f}ms" for stage, seconds in page.timings.items())
+            lines.append(f"  {total:7.2f}s  {page.url}  ({stages})")
+
+        if self._peak_snapshot is not None:
+            url, snapshot = self._peak_snapshot
+            lines += ["", f"Top allocation sites for highest-memory sampled page "
+                          f"({self._peak_memory / (1024 * 1024):.1f} MB peak): {url}"]
+            for stat in snapshot.statistics('lineno')[:15]:
+                lines.append(f"  {stat}")
+
+        if self._stats is not None:
+            lines += ["", "cProfile data: profile.pstats (python -m pstats profile.pstats)"]
+
+        return '\n'.join(lines) + '\n'
+
+def add_profile_arguments(parser):
+    """Add the profiling options to a scraper's argument parser."""
+    parser.add_argument('--profile', action='store_true', help='Record stage timings and profile data')
+    parser.add_argument('--profile-dir', help='Directory for profile output (default: <output>/profile)')
+    parser.add_argument('--profile-sample', type=float, default=0.1, help='Fraction of pages to run under cProfile/tracemalloc')
+    parser.add_argument('--profile-slowest', type=int, default=20, help='Number of slowest pages to keep')
+    parser.add_argument('--slow-threshold', type=float, default=None, help='Keep pages taking longer than this many seconds')
+    parser.add_argument('--memory-threshold', type=float, default=None, help='Keep sampled pages allocating more than this many MB')
+
+def profiler_from_args(args):
+    """Create a profiler from parsed arguments, or None if profiling is off."""
+    if not args.profile:
+        return None
+    return Profiler(
+        args.profile_dir or os.path.join(args.output, 'profile'),
+        args.profile_sample,
+        args.profile_slowest,
+        args.slow_threshold,
+        args.memory_threshold * 1024 * 1024 if args.memory_threshold is not None else None
+    )
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Re-convert archived pages to Markdown without touching the network.
+"""
+import os
+import argparse
+import logging
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from bs4 import BeautifulSoup
+from requests import Response
+from requests.utils import get_encoding_from_headers
+from tqdm import tqdm
+
+from utils import (
+    setup_directory,
+    convert_page
+)
+from capture_archive import iter_records, read_index
+from output_writer import MarkdownWriter, add_writer_arguments, writer_from_args
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+def decode_body(headers, body):
+    """Decode a response body the same way requests does for response.text."""
+    response = Response()
+    response._content = body
+    response.headers = headers
+    response.encoding = get_encoding_from_headers(headers)
+    return response.text
+
+def convert_record(url, headers, body):
+    """Convert a single archived response to markdown."""
+    try:
+        soup = BeautifulSoup(decode_body(headers, body), 'html.parser')
+        filename, markdown_content = convert_page(url, soup)
+        return url, filename, markdown_content, None
+    except Exception as e:
+        return url, None, None, str(e)
+
+def save_converted(future, writer):
+    """Save a conversion result through the writer and build its result row."""
+    url, filename, markdown_content, error = future.result()
+    if error is None:
+        try:
+            filepath = writer.save(url, markdown_content, filename)
+            return {'url': url, 'file': filepath, 'status': 'success', 'error': None}
+        except Exception as e:
+            error = str(e)
+    return {'url': url, 'file': None, 'status': 'failed', 'error': error}
+
+def reconvert_archive(archive_dir, output_dir, workers=None, latest_only=True, writer=None):
+    """
+    Stream archived responses through a pool of conversion processes.
+    Files are written by this process so output names stay collision-free.
+    """
+    setup_directory(output_dir)
+    writer = writer or MarkdownWriter(output_dir)
+    total = len(read_index(archive_dir, latest_only))
+    logger.info(f"Found {total} archived pages to convert")
+
+    # Keep a bounded number of records in flight so memory stays flat
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 4
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            tqdm(total=total, desc=f"Converting with {workers} processes") as progress:
+        pending = set()
+        for record in iter_records(archive_dir, latest_only):
+            if not record or record['status'] != 200:
+                progress.update(1)
+                continue
+            pending.add(executor.submit(
+                convert_record, record['url'], record['headers'], record['body']
+            ))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.append(save_converted(future, writer))
+                progress.update(len(done))
+
+        for future in pending:
+            results.append(save_converted(future, writer))
+            progress.update(1)
+
+    # Files renamed after a name collision are reported under their final path
+    return writer.update_results(results)
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Re-convert archived pages to Markdown without fetching')
+    parser.add_argument('archive_dir', help='Directory containing the capture archive')
+    parser.add_argument('--output', default='knowledge_base', help='Output directory')
+    parser.add_argument('--workers', type=int, default=None, help='Number of conversion processes (default: CPU count)')
+    parser.add_argument('--all-captures', action='store_true', help='Convert every capture instead of only the latest per URL')
+    add_writer_arguments(parser)
+
+    args = parser.parse_args()
+
+    logger.info(f"Starting reconversion from archive: {args.archive_dir}")
+    writer = writer_from_args(args)
+    try:
+        results = reconvert_archive(args.archive_dir, args.output, args.workers, not args.all_captures, writer)
+    finally:
+        writer.close()
+
+    # Save results
+    results_df = pd.DataFrame(results, columns=['url', 'file', 'status', 'error'])
+    results_path = os.path.join(args.output, 'reconvert_results.csv')
+    results_df.to_csv(results_path, index=False)
+    logger.info(f"Saved results to {results_path}")
+
+    success_count = results_df[results_df['status'] == 'success'].shape[0]
+    logger.info(f"Completed: {success_count}/{len(results)} pages successfully converted")
+
+if __name__ == "__main__":
+    main()
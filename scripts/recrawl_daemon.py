@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Long-running recrawl daemon with change-aware scheduling.
+
+Keeps a persistent priority queue of URLs in SQLite. Each URL's next fetch
+time is estimated from how often its content has actually changed, seeded
+by the sitemap changefreq and lastmod values. Fetches are paced at a steady
+global rate with a minimum delay between requests to the same host.
+"""
+import time
+import signal
+import sqlite3
+import hashlib
+import argparse
+import logging
+import pandas as pd
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from utils import (
+    setup_directory,
+    fetch_url,
+    convert_page
+)
+from sitemap_parser import collect_sitemap_entries
+from output_writer import MarkdownWriter, add_writer_arguments, writer_from_args
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Expected change interval for each sitemap changefreq value
+CHANGEFREQ_INTERVALS = {
+    'always': HOUR,
+    'hourly': HOUR,
+    'daily': DAY,
+    'weekly': 7 * DAY,
+    'monthly': 30 * DAY,
+    'yearly': 365 * DAY,
+}
+DEFAULT_INTERVAL = 7 * DAY
+
+# How many observed intervals the changefreq prior is worth
+PRIOR_WEIGHT = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    next_due REAL NOT NULL,
+    changefreq TEXT,
+    lastmod REAL,
+    first_fetch REAL,
+    last_fetch REAL,
+    content_hash TEXT,
+    file TEXT,
+    checks INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pages_next_due ON pages (next_due);
+CREATE INDEX IF NOT EXISTS pages_host_next_due ON pages (host, next_due);
+"""
+
+def parse_lastmod(value):
+    """Parse a sitemap lastmod value to a UNIX timestamp, or None."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def estimate_interval(changes, observed, changefreq, min_interval, max_interval):
+    """
+    Estimate the refresh interval for a page.
+    The observed change rate is blended with the changefreq prior, so new
+    pages follow the sitemap and established pages follow their history.
+    """
+    if changefreq == 'never':
+        prior = max_interval
+    else:
+        prior = CHANGEFREQ_INTERVALS.get(changefreq, DEFAULT_INTERVAL)
+    rate = (changes + PRIOR_WEIGHT) / (observed + PRIOR_WEIGHT * prior)
+    return min(max(1 / rate, min_interval), max_interval)
+
+def fetch_page(url, writer, previous_hash):
+    """Fetch and convert a page, saving it only when its content changed."""
+    try:
+        soup, response = fetch_url(url, delay=0)
+        if not soup:
+            return {'url': url, 'status': 'failed', 'error': 'Failed to fetch content'}
+
+        filename, markdown_content = convert_page(url, soup)
+        content_hash = hashlib.sha256(markdown_content.encode('utf-8')).hexdigest()
+
+        filepath = None
+        if content_hash != previous_hash:
+            filepath = writer.save(url, markdown_content, filename)
+
+        return {
+            'url': url,
+            'status': 'success',
+            'content_hash': content_hash,
+            'file': filepath
+        }
+
+    except Exception as e:
+        logger.error(f"Error processing {url}: {str(e)}")
+        return {'url': url, 'status': 'failed', 'error': str(e)}
+
+class RecrawlDaemon:
+    """Schedules and runs page refreshes from a persistent queue."""
+
+    def __init__(self, state_path, output_dir, rate=1.0, host_delay=5.0, workers=4,
+                 min_interval=HOUR, max_interval=90 * DAY, writer=None):
+        self.writer = writer or MarkdownWriter(setup_directory(output_dir))
+        self.rate = rate
+        self.host_delay = host_delay
+        self.workers = workers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.stopping = False
+
+        # Files the writer renamed after a name collision, applied from the main thread
+        self._renames = []
+        self.writer.on_rename = lambda url, file_path: self._renames.append((file_path, url))
+
+        self.db = sqlite3.connect(state_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def add_entries(self, entries):
+        """
+        Add URLs to the queue and update their sitemap metadata.
+        Pages whose lastmod is newer than their last fetch become due now.
+        """
+        now = time.time()
+        added = 0
+        for entry in entries:
+            url = entry['url']
+            changefreq = entry.get('changefreq') if isinstance(entry.get('changefreq'), str) else None
+            lastmod = parse_lastmod(entry.get('lastmod'))
+
+            row = self.db.execute("SELECT last_fetch FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                self.db.execute(
+                    "INSERT INTO pages (url, host, next_due, changefreq, lastmod) VALUES (?, ?, ?, ?, ?)",
+                    (url, urlparse(url).netloc, now, changefreq, lastmod)
+                )
+                added += 1
+            else:
+                self.db.execute(
+                    "UPDATE pages SET changefreq = ?, lastmod = ? WHERE url = ?",
+                    (changefreq, lastmod, url)
+                )
+                if lastmod and row['last_fetch'] and lastmod > row['last_fetch']:
+                    self.db.execute(
+                        "UPDATE pages SET next_due = MIN(next_due, ?) WHERE url = ?",
+                        (now, url)
+                    )
+        self.db.commit()
+        return added
+
+    def record_result(self, result):
+        """Update a page's history and schedule its next fetch."""
+        now = time.time()
+        row = self.db.execute("SELECT * FROM pages WHERE url = ?", (result['url'],)).fetchone()
+
+        if result['status'] != 'success':
+            failures = row['failures'] + 1
+            retry = min(self.min_interval * (2 ** (failures - 1)), self.max_interval)
+            self.db.execute(
+                "UPDATE pages SET failures = ?, next_due = ? WHERE url = ?",
+                (failures, now + retry, result['url'])
+            )
+            self.db.commit()
+            return
+
+        changed = row['content_hash'] is not None and result['content_hash'] != row['content_hash']
+        changes = row['changes'] + (1 if changed else 0)
+        first_fetch = row['first_fetch'] or now
+
+        interval = estimate_interval(
+            changes, now - first_fetch, row['changefreq'], self.min_interval, self.max_interval
+        )
+
+        self.db.execute(
+            """UPDATE pages SET first_fetch = ?, last_fetch = ?, content_hash = ?,
+               file = COALESCE(?, file), checks = checks + 1, changes = ?,
+               failures = 0, next_due = ? WHERE url = ?""",
+            (first_fetch, now, result['content_hash'], self.writer.path_for(result['url'], result['file']), changes,
+             now + interval, result['url'])
+        )
+        self.db.commit()
+
+        if changed:
+            logger.info(f"Changed: {result['url']} (next check in {interval / HOUR:.1f}h)")
+
+    def apply_renames(self):
+        """Point pages at their files' new paths after collision renames."""
+        if not self._renames:
+            return
+        renames = self._renames[:]
+        del self._renames[:len(renames)]
+        self.db.executemany("UPDATE pages SET file = ? WHERE url = ?", renames)
+        self.db.commit()
+
+    def next_page(self, now, blocked_hosts, busy_urls):
+        """
+        Return the most overdue page on a host that can be fetched now, or None.
+        Hosts are considered by their most overdue page, so a backlog on one
+        host cannot hide due pages on the others.
+        """
+        hosts = self.db.execute(
+            "SELECT host, MIN(next_due) AS due FROM pages WHERE next_due <= ? GROUP BY host ORDER BY due",
+            (now,)
+        ).fetchall()
+        for row in hosts:
+            if row['host'] in blocked_hosts:
+                continue
+            pages = self.db.execute(
+                "SELECT url, host, content_hash FROM pages WHERE host = ? AND next_due <= ? ORDER BY next_due",
+                (row['host'], now)
+            )
+            for page in pages:
+                if page['url'] not in busy_urls:
+                    return page
+        return None
+
+    def next_due_time(self):
+        """Return when the next page becomes due, or None if the queue is empty."""
+        row = self.db.execute("SELECT MIN(next_due) FROM pages").fetchone()
+        return row[0]
+
+    def stop(self, *args):
+        """Finish in-flight fetches and exit."""
+        logger.info("Stopping after in-flight fetches complete...")
+        self.stopping = True
+
+    def run(self, sitemaps=None, sitemap_interval=DAY, max_fetches=0):
+        """Run the scheduling loop until stopped."""
+        sitemaps = sitemaps or []
+        next_sitemap_refresh = 0
+        next_dispatch = time.time()
+        host_ready = {}
+        in_flight = {}
+        fetches = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while not self.stopping or in_flight:
+                now = time.time()
+
+                # Refresh sitemap metadata periodically
+                if sitemaps and now >= next_sitemap_refresh and not self.stopping:
+                    for sitemap_url in sitemaps:
+                        added = self.add_entries(collect_sitemap_entries(sitemap_url))
+                        logger.info(f"Sitemap {sitemap_url}: {added} new URLs queued")
+                    next_sitemap_refresh = now + sitemap_interval
+
+                # Record completed fetches
+                done = [future for future in in_flight if future.done()]
+                for future in done:
+                    in_flight.pop(future)
+                    self.record_result(future.result())
+                self.apply_renames()
+
+                if self.stopping or (max_fetches and fetches >= max_fetches):
+                    self.stopping = True
+                    if in_flight:
+                        wait(in_flight, timeout=1, return_when=FIRST_COMPLETED)
+                    continue
+
+                if len(in_flight) >= self.workers:
+                    wait(in_flight, timeout=1, return_when=FIRST_COMPLETED)
+                    continue
+
+                # Keep a steady global fetch rate
+                if now < next_dispatch:
+                    time.sleep(min(next_dispatch - now, 1))
+                    continue
+
+                # Pick the most overdue page whose host budget allows a fetch
+                blocked = {host for host, ready in host_ready.items() if ready > now}
+                page = self.next_page(now, blocked, set(in_flight.values()))
+                if page is None:
+                    next_due = self.next_due_time()
+                    wait_time = 1 if next_due is None else min(max(next_due - now, 0.1), 1)
+                    time.sleep(wait_time)
+                    continue
+
+                future = executor.submit(fetch_page, page['url'], self.writer, page['content_hash'])
+                in_flight[future] = page['url']
+                host_ready[page['host']] = now + self.host_delay
+                next_dispatch = max(next_dispatch, now) + 1 / self.rate
+                fetches += 1
+
+        self.apply_renames()
+        self.writer.close()
+        self.db.close()
+        logger.info(f"Recrawl daemon stopped after {fetches} fetches")
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Continuously refresh pages based on how often they change')
+    parser.add_argument('--sitemap', action='append', default=[], help='Sitemap URL to queue pages from (repeatable)')
+    parser.add_argument('--csv', help='CSV file with URLs (and optional lastmod/changefreq columns) to queue')
+    parser.add_argument('--column', default='url', help='Column name in CSV that contains URLs')
+    parser.add_argument('--output', default='knowledge_base', help='Output directory')
+    parser.add_argument('--state', default='recrawl_state.db', help='SQLite file holding the queue and page history')
+    parser.add_argument('--rate', type=float, default=1.0, help='Fetches per second across all hosts')
+    parser.add_argument('--host-delay', type=float, default=5.0, help='Minimum seconds between requests to the same host')
+    parser.add_argument('--workers', type=int, default=4, help='Number of parallel fetches')
+    parser.add_argument('--min-interval', type=float, default=1, help='Minimum hours between checks of a page')
+    parser.add_argument('--max-interval', type=float, default=90 * 24, help='Maximum hours between checks of a page')
+    parser.add_argument('--sitemap-interval', type=float, default=24, help='Hours between sitemap refreshes')
+    parser.add_argument('--max-fetches', type=int, default=0, help='Stop after this many fetches (default: run forever)')
+    add_writer_arguments(parser)
+
+    args = parser.parse_args()
+
+    daemon = RecrawlDaemon(
+        args.state, args.output, args.rate, args.host_delay, args.workers,
+        args.min_interval * HOUR, args.max_interval * HOUR, writer_from_args(args)
+    )
+
+    if args.csv:
+        df = pd.read_csv(args.csv)
+        df = df.rename(columns={args.column: 'url'}).dropna(subset=['url'])
+        entries = df.to_dict('records')
+        logger.info(f"Queued {daemon.add_entries(entries)} new URLs from {args.csv}")
+
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+
+    logger.info(f"Starting recrawl daemon with state: {args.state}")
+    daemon.run(args.sitemap, args.sitemap_interval * HOUR, args.max_fetches)
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,9 @@ Main scraper for converting web content to Markdown.
 """
 import os
 import sys
+import time
 import argparse
 import pandas as pd
-from urllib.parse import urlparse
 from tqdm import tqdm
 import logging
 
@@ -19,11 +19,14 @@ except ImportError:
 
 from utils import (
     setup_directory,
-    clean_filename,
-    fetch_url,
-    html_to_markdown,
-    save_markdown
+    fetch_response,
+    parse_html,
+    convert_page
 )
+from asset_downloader import localize_assets, stored_asset_rewriter
+from capture_archive import ArchiveWriter
+from profiling import NullProfiler, add_profile_arguments, profiler_from_args
+from output_writer import MarkdownWriter, add_writer_arguments, writer_from_args
 
 # Set up logging
 logging.basicConfig(
@@ -33,47 +36,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def process_url(url, output_dir, delay=1):
+def process_url(url, writer, delay=1, archive=None, profiler=None):
     """Process a single URL and save as markdown."""
-    # Fetch content
-    soup, response = fetch_url(url, delay)
-    if not soup:
-        logger.error(f"Failed to process {url}")
-        return None
-    
-    # Extract title for filename if available
-    title = None
-    if soup.title:
-        title = soup.title.string
-    
-    # Generate filename
-    filename = clean_filename(url, title)
-    
-    # Convert to markdown
-    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-    markdown_content = html_to_markdown(soup, base_url)
-    
-    # Add source URL at the top of the markdown content
-    if markdown_content.startswith('# '):
-        # If content starts with a title, insert after the title
-        lines = markdown_content.split('\n', 1)
-        if len(lines) > 1:
-            markdown_content = f"{lines[0]}\n\n> **Source**: [{url}]({url})\n\n{lines[1]}"
-        else:
-            markdown_content = f"{lines[0]}\n\n> **Source**: [{url}]({url})"
-    else:
-        # Insert at the beginning
-        markdown_content = f"> **Source**: [{url}]({url})\n\n{markdown_content}"
-    
-    # Save to file
-    filepath = save_markdown(markdown_content, output_dir, filename)
+    profiler = profiler or NullProfiler()
+    with profiler.page(url) as page:
+        time.sleep(delay)  # Be respectful to servers
+        
+        # Fetch content
+        with page.stage('fetch'):
+            response = fetch_response(url)
+        if response is None:
+            logger.error(f"Failed to process {url}")
+            return None
+        
+        # Keep the raw response for offline reconversion
+        if archive:
+            archive.write_response(url, response)
+        
+        # Decode once; the HTML is kept for profiling captures
+        with page.stage('parse'):
+            html = response.text
+            soup = parse_html(html)
+        page.html = html
+        
+        # Convert to markdown
+        with page.stage('html_to_markdown'):
+            filename, markdown_content = convert_page(url, soup)
+        
+        # Save to file
+        with page.stage('save_markdown'):
+            filepath = writer.save(url, markdown_content, filename)
     
     return filepath
 
-def process_csv(csv_path, output_dir, delay=1, column_name='url'):
+def process_csv(csv_path, output_dir, delay=1, column_name='url', archive=None, profiler=None, writer=None):
     """Process all URLs in a CSV file."""
     # Create output directory
     setup_directory(output_dir)
+    writer = writer or MarkdownWriter(output_dir)
     
     # Read CSV
     try:
@@ -105,7 +105,7 @@ def process_csv(csv_path, output_dir, delay=1, column_name='url'):
     
     results = []
     for url in tqdm(urls, desc="Processing URLs"):
-        filepath = process_url(url, output_dir, delay)
+        filepath = process_url(url, writer, delay, archive, profiler)
         if filepath:
             results.append({
                 'url': url, 
@@ -119,8 +119,8 @@ def process_csv(csv_path, output_dir, delay=1, column_name='url'):
                 'status': 'failed'
             })
     
-    # Save results
-    results_df = pd.DataFrame(results)
+    # Save results, with files renamed after a name collision at their final path
+    results_df = pd.DataFrame(writer.update_results(results))
     results_path = os.path.join(output_dir, 'scraping_results.csv')
     results_df.to_csv(results_path, index=False)
     logger.info(f"Saved results to {results_path}")
@@ -137,11 +137,34 @@ def main():
     parser.add_argument('--output', default='knowledge_base', help='Output directory')
     parser.add_argument('--delay', type=float, default=1, help='Delay between requests in seconds')
     parser.add_argument('--column', default='url', help='Column name in CSV that contains URLs')
+    parser.add_argument('--archive', help='Directory to store raw responses for offline reconversion')
+    parser.add_argument('--assets', action='store_true', help='Download images and attachments into the output directory')
+    parser.add_argument('--asset-workers', type=int, default=4, help='Number of parallel asset downloads')
+    parser.add_argument('--asset-max-mb', type=float, default=500, help='Total asset download budget in MB')
+    add_profile_arguments(parser)
+    add_writer_arguments(parser)
     
     args = parser.parse_args()
     
     logger.info(f"Starting scraper with CSV: {args.csv_path}")
-    process_csv(args.csv_path, args.output, args.delay, args.column)
+    archive = ArchiveWriter(args.archive) if args.archive else None
+    profiler = profiler_from_args(args)
+    writer = writer_from_args(args)
+    if args.assets:
+        # Pages on disk already point at local assets, compare them that way
+        writer.compare_transform = stored_asset_rewriter(args.output)
+    try:
+        results_df = process_csv(args.csv_path, args.output, args.delay, args.column, archive, profiler, writer)
+    finally:
+        writer.close()
+        if archive:
+            archive.close()
+        if profiler:
+            profiler.finish()
+    
+    if args.assets and results_df is not None:
+        files = results_df['file'].dropna().tolist()
+        localize_assets(files, args.output, args.asset_workers, int(args.asset_max_mb * 1024 * 1024))
     logger.info("Scraping completed")
 
 if __name__ == "__main__":
@@ -58,10 +58,37 @@ def extract_urls_from_sitemap(content, base_url):
     
     return absolute_urls
 
-def process_sitemap(sitemap_url, output_file='urls.csv'):
-    """Process a sitemap or sitemap index and extract all URLs."""
-    logger.info(f"Processing sitemap: {sitemap_url}")
+def extract_entries_from_sitemap(content, base_url):
+    """
+    Extract URL entries with their lastmod and changefreq from a sitemap.
+    Falls back to bare URLs for sitemaps without <url> elements.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    entries = []
     
+    for url_tag in soup.find_all('url'):
+        loc = url_tag.find('loc')
+        if not loc:
+            continue
+        url = loc.text.strip()
+        lastmod = url_tag.find('lastmod')
+        changefreq = url_tag.find('changefreq')
+        entries.append({
+            'url': urljoin(base_url, url) if not url.startswith(('http://', 'https://')) else url,
+            'lastmod': lastmod.text.strip() if lastmod else None,
+            'changefreq': changefreq.text.strip().lower() if changefreq else None
+        })
+    
+    if not entries:
+        entries = [
+            {'url': url, 'lastmod': None, 'changefreq': None}
+            for url in extract_urls_from_sitemap(content, base_url)
+        ]
+    
+    return entries
+
+def collect_sitemap_entries(sitemap_url):
+    """Fetch a sitemap or sitemap index and return all URL entries."""
     content = fetch_sitemap(sitemap_url)
     if not content:
         return []
@@ -69,7 +96,7 @@ def process_sitemap(sitemap_url, output_file='urls.csv'):
     # Get base URL for resolving relative links
     base_url = re.match(r'(https?://[^/]+)', sitemap_url).group(1)
     
-    all_urls = []
+    all_entries = []
     
     # Check if this is a sitemap index
     if is_sitemap_index(content):
@@ -79,17 +106,26 @@ def process_sitemap(sitemap_url, output_file='urls.csv'):
         for child_url in tqdm(child_sitemaps, desc="Processing child sitemaps"):
             child_content = fetch_sitemap(child_url)
             if child_content:
-                urls = extract_urls_from_sitemap(child_content, base_url)
-                all_urls.extend(urls)
-                logger.info(f"Found {len(urls)} URLs in {child_url}")
+                entries = extract_entries_from_sitemap(child_content, base_url)
+                all_entries.extend(entries)
+                logger.info(f"Found {len(entries)} URLs in {child_url}")
     else:
         # Regular sitemap
-        all_urls = extract_urls_from_sitemap(content, base_url)
-        logger.info(f"Found {len(all_urls)} URLs in sitemap")
+        all_entries = extract_entries_from_sitemap(content, base_url)
+        logger.info(f"Found {len(all_entries)} URLs in sitemap")
+    
+    return all_entries
+
+def process_sitemap(sitemap_url, output_file='urls.csv'):
+    """Process a sitemap or sitemap index and extract all URLs."""
+    logger.info(f"Processing sitemap: {sitemap_url}")
+    
+    all_entries = collect_sitemap_entries(sitemap_url)
+    all_urls = [entry['url'] for entry in all_entries]
     
     # Save to CSV
     if all_urls:
-        df = pd.DataFrame({'url': all_urls})
+        df = pd.DataFrame(all_entries, columns=['url', 'lastmod', 'changefreq'])
         df.to_csv(output_file, index=False)
         logger.info(f"Saved {len(all_urls)} URLs to {output_file}")
     else:
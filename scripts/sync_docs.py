@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Incrementally sync a documentation tree into a deployment directory.
+
+A manifest of file hashes is kept outside the destination, by default under
+.sync_manifests/ in the current directory, so unchanged files are skipped,
+removed files are deleted, and only the affected sections of the structure
+index are regenerated.
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+import argparse
+import logging
+
+from utils import setup_directory, ASSETS_DIRNAME
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# Default manifests live here, one per destination, named by its path hash
+MANIFEST_DIRNAME = '.sync_manifests'
+
+# Older manifests were kept inside the destination or right next to it
+LEGACY_MANIFEST_FILENAME = '.sync_manifest.json'
+LEGACY_MANIFEST_SUFFIX = '.sync_manifest.json'
+
+# Markers delimiting one top-level directory's section in the structure index
+SECTION_RE = re.compile(
+    r'<!-- structure:(?P<name>[^ ]+) -->\n(?P<body>.*?)<!-- /structure:(?P=name) -->\n',
+    re.DOTALL
+)
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file."""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def default_manifest_path(dest_dir):
+    """
+    Return the default manifest path for dest_dir.
+    It is kept under the current directory rather than next to dest_dir, as
+    the destination's parent is often the repository being published.
+    """
+    dest_key = hashlib.sha1(os.path.abspath(dest_dir).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(MANIFEST_DIRNAME, f"{dest_key}.json")
+
+def load_manifest(manifest_path):
+    """Load the manifest from the last sync, or an empty one."""
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest_path, manifest):
+    """Write the manifest atomically."""
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def list_files(base_dir):
+    """List relative paths of the non-hidden files under base_dir."""
+    rel_paths = []
+    for root, dirs, files in os.walk(base_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for filename in sorted(files):
+            if not filename.startswith('.'):
+                file_path = os.path.join(root, filename)
+                rel_paths.append(os.path.relpath(file_path, base_dir).replace(os.sep, '/'))
+    return rel_paths
+
+def scan_source(source_dir, previous):
+    """
+    Build the manifest for source_dir.
+    Files whose size and mtime match the previous manifest are not re-hashed.
+    """
+    manifest = {}
+    for rel_path in list_files(source_dir):
+        file_path = os.path.join(source_dir, rel_path)
+        stat = os.stat(file_path)
+
+        entry = previous.get(rel_path)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            digest = entry['sha256']
+        else:
+            digest = hash_file(file_path)
+
+        manifest[rel_path] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'sha256': digest
+        }
+    return manifest
+
+def place_file(src, dest, hardlink=False):
+    """Copy or hardlink src to dest, replacing dest atomically."""
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp_path = dest + '.sync-tmp'
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    if hardlink:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            # Different filesystem or unsupported, fall back to copying
+            shutil.copy2(src, tmp_path)
+    else:
+        shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+def remove_empty_dirs(dest_dir, rel_path):
+    """Remove directories left empty after deleting rel_path."""
+    parent = os.path.dirname(os.path.join(dest_dir, rel_path))
+    while os.path.abspath(parent) != os.path.abspath(dest_dir):
+        if os.listdir(parent):
+            break
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+def sync_tree(source_dir, dest_dir, hardlink=False, manifest_path=None):
+    """
+    Sync source_dir into dest_dir.
+    Returns the lists of added, updated and deleted relative paths.
+    """
+    setup_directory(dest_dir)
+    manifest_path = manifest_path or default_manifest_path(dest_dir)
+    previous = load_manifest(manifest_path)
+
+    # Move a manifest from inside or next to the published tree to its new location
+    for legacy_path in (os.path.join(dest_dir, LEGACY_MANIFEST_FILENAME),
+                        os.path.normpath(os.path.abspath(dest_dir)) + LEGACY_MANIFEST_SUFFIX):
+        if os.path.exists(legacy_path) and os.path.abspath(legacy_path) != os.path.abspath(manifest_path):
+            previous = previous or load_manifest(legacy_path)
+            os.remove(legacy_path)
+
+    current = scan_source(source_dir, previous)
+
+    # Without a manifest, anything in the destination may be stale
+    if not previous:
+        previous = {rel_path: None for rel_path in list_files(dest_dir)}
+
+    added, updated, deleted = [], [], []
+
+    for rel_path, entry in current.items():
+        dest_path = os.path.join(dest_dir, rel_path)
+        old = previous.get(rel_path)
+        if old and old['sha256'] == entry['sha256'] and os.path.exists(dest_path):
+            continue
+        place_file(os.path.join(source_dir, rel_path), dest_path, hardlink)
+        (updated if rel_path in previous else added).append(rel_path)
+
+    for rel_path in previous:
+        if rel_path not in current:
+            dest_path = os.path.join(dest_dir, rel_path)
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+                remove_empty_dirs(dest_dir, rel_path)
+            deleted.append(rel_path)
+
+    save_manifest(manifest_path, current)
+    return added, updated, deleted
+
+def render_section(docs_dir, name, link_prefix):
+    """Render the structure listing for one top-level directory."""
+    lines = []
+
+    def walk(dir_path, rel_path, indent):
+        lines.append(f"{indent}- [📁 {os.path.basename(dir_path)}]({link_prefix}{rel_path}/)")
+        if os.path.isfile(os.path.join(dir_path, 'README.md')):
+            lines.append(f"{indent}  - [📄 README.md]({link_prefix}{rel_path}/README.md)")
+        for sub in sorted(os.listdir(dir_path)):
+            sub_path = os.path.join(dir_path, sub)
+            if os.path.isdir(sub_path) and not sub.startswith('.'):
+                walk(sub_path, f"{rel_path}/{sub}", indent + '  ')
+
+    walk(os.path.join(docs_dir, name), name, '')
+    return '\n'.join(lines) + '\n'
+
+def update_structure_index(index_path, docs_dir, changed_paths, title, description):
+    """
+    Update the structure index for directories touched by changed_paths.
+    Sections for other directories are kept as they are.
+    """
+    link_prefix = os.path.relpath(docs_dir, os.path.dirname(os.path.abspath(index_path)))
+    link_prefix = '' if link_prefix == '.' else link_prefix.replace(os.sep, '/') + '/'
+
+    top_dirs = sorted(
+        d for d in os.listdir(docs_dir)
+        if os.path.isdir(os.path.join(docs_dir, d)) and not d.startswith('.') and d != ASSETS_DIRNAME
+    )
+
+    content = None
+    first = None
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        first = SECTION_RE.search(content)
+
+    if first:
+        header = content[:first.start()]
+        sections = {m.group('name'): m.group('body') for m in SECTION_RE.finditer(content)}
+        affected = {p.split('/', 1)[0] for p in changed_paths if '/' in p}
+    else:
+        # No index yet, or one without section markers: build it in full
+        header = f"# {title}\n\n{description}\n\n## Directory Structure\n\n"
+        sections = {}
+        affected = set(top_dirs)
+
+    for name in top_dirs:
+        if name in affected or name not in sections:
+            sections[name] = render_section(docs_dir, name, link_prefix)
+
+    new_content = header + ''.join(
+        f"<!-- structure:{name} -->\n{sections[name]}<!-- /structure:{name} -->\n"
+        for name in top_dirs
+    )
+
+    if new_content == content:
+        return False
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write(new_content)
+    return True
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Incrementally sync documentation into a deployment directory')
+    parser.add_argument('source_dir', help='Directory containing the documentation to deploy')
+    parser.add_argument('dest_dir', help='Destination directory')
+    parser.add_argument('--hardlink', action='store_true', help='Hardlink files instead of copying them')
+    parser.add_argument('--manifest', help='Manifest file to track synced files in '
+                        f'(default: {MANIFEST_DIRNAME}/<hash of dest_dir>.json in the current directory)')
+    parser.add_argument('--index', help='Structure index file to keep up to date')
+    parser.add_argument('--title', default='Documentation Repository', help='Title for a new structure index')
+    parser.add_argument('--description', default='This repository contains comprehensive documentation.',
+                        help='Description for a new structure index')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source_dir):
+        logger.error(f"Source directory not found: {args.source_dir}")
+        return
+
+    logger.info(f"Syncing {args.source_dir} to {args.dest_dir}")
+    added, updated, deleted = sync_tree(args.source_dir, args.dest_dir, args.hardlink, args.manifest)
+    logger.info(f"Sync: {len(added)} added, {len(updated)} updated, {len(deleted)} deleted")
+
+    if args.index:
+        if update_structure_index(args.index, args.dest_dir, added + deleted, args.title, args.description):
+            logger.info(f"Updated structure index: {args.index}")
+        else:
+            logger.info("Structure index unchanged")
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@ import os
 import re
 import time
 import logging
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
 
@@ -14,6 +16,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+}
+
+# Directory under the output directory where downloaded assets are stored
+ASSETS_DIRNAME = 'assets'
+
+# Matches markdown images and links with absolute URLs
+MARKDOWN_LINK_RE = re.compile(r'(!?)\[([^\]]*)\]\((https?://[^)\s]+)\)')
+
+# Source header written at the top of every scraped page
+SOURCE_RE = re.compile(r'^> \*\*Source\*\*: \[[^\]]*\]\((https?://[^)\s]+)\)', re.MULTILINE)
+
+# Only the first few lines are read when looking for the Source header
+SOURCE_HEADER_BYTES = 4096
+
+# Connection pool size per host for the shared session
+POOL_SIZE = 20
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """
+    Return the shared requests session.
+    Pages and assets are fetched through the same connection pool so
+    keep-alive connections are reused across workers.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
 def setup_directory(output_dir):
     """Create output directory if it doesn't exist."""
     if not os.path.exists(output_dir):
@@ -21,6 +63,22 @@ def setup_directory(output_dir):
         logger.info(f"Created output directory: {output_dir}")
     return output_dir
 
+def find_markdown_files(docs_dir):
+    """Find all markdown files under docs_dir, skipping the assets directory."""
+    markdown_files = []
+    for root, dirs, files in os.walk(docs_dir):
+        dirs[:] = [d for d in dirs if d != ASSETS_DIRNAME and not d.startswith('.')]
+        for filename in files:
+            if filename.lower().endswith('.md'):
+                markdown_files.append(os.path.join(root, filename))
+    return sorted(markdown_files)
+
+def read_source_url(file_path):
+    """Read the source URL from a scraped page's header, if present."""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        match = SOURCE_RE.search(f.read(SOURCE_HEADER_BYTES))
+    return match.group(1) if match else None
+
 def clean_filename(url, title=None):
     """
     Generate a clean filename from URL or title.
@@ -62,6 +120,22 @@ def clean_filename(url, title=None):
     
     return clean_name
 
+def fetch_response(url):
+    """Fetch URL through the shared session. Returns the response or None."""
+    try:
+        response = get_session().get(url, timeout=30)
+        response.raise_for_status()
+        logger.info(f"Successfully fetched: {url}")
+        return response
+    
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error fetching {url}: {str(e)}")
+        return None
+
+def parse_html(html):
+    """Parse HTML text into a soup object."""
+    return BeautifulSoup(html, 'html.parser')
+
 def fetch_url(url, delay=1):
     """
     Fetch content from URL with specified delay between requests.
@@ -69,20 +143,11 @@ def fetch_url(url, delay=1):
     """
     time.sleep(delay)  # Be respectful to servers
     
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        logger.info(f"Successfully fetched: {url}")
-        return soup, response
-    
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching {url}: {str(e)}")
+    response = fetch_response(url)
+    if response is None:
         return None, None
+    
+    return parse_html(response.text), response
 
 def html_to_markdown(soup, base_url):
     """
@@ -163,6 +228,37 @@ def html_to_markdown(soup, base_url):
     
     return markdown
 
+def convert_page(url, soup):
+    """
+    Convert a fetched page to markdown with its source URL header.
+    Returns the filename and the markdown content.
+    """
+    # Extract title for filename if available
+    title = None
+    if soup.title:
+        title = soup.title.string
+    
+    # Generate filename
+    filename = clean_filename(url, title)
+    
+    # Convert to markdown
+    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+    markdown_content = html_to_markdown(soup, base_url)
+    
+    # Add source URL at the top of the markdown content
+    if markdown_content.startswith('# '):
+        # If content starts with a title, insert after the title
+        lines = markdown_content.split('\n', 1)
+        if len(lines) > 1:
+            markdown_content = f"{lines[0]}\n\n> **Source**: [{url}]({url})\n\n{lines[1]}"
+        else:
+            markdown_content = f"{lines[0]}\n\n> **Source**: [{url}]({url})"
+    else:
+        # Insert at the beginning
+        markdown_content = f"> **Source**: [{url}]({url})\n\n{markdown_content}"
+    
+    return filename, markdown_content
+
 def save_markdown(content, output_dir, filename):
     """Save markdown content to file."""
     file_path = os.path.join(output_dir, filename)
@@ -0,0 +1,55 @@
+"""Round-trip checks for the capture archive."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from capture_archive import (
+    ArchiveWriter,
+    ARCHIVE_PREFIX,
+    ARCHIVE_SUFFIX,
+    iter_records,
+    list_archive_files
+)
+
+def test_record_round_trip(tmp_path):
+    body = 'caf\xe9 na\xefve'.encode('latin-1') + b'\x80\xff\x00'
+    headers = {
+        'Content-Type': 'text/html; charset=ISO-8859-1',
+        'Last-Modified': 'Mon, 05 Oct 2026 10:00:00 GMT',
+        'ETag': '"abc123"',
+        'Content-Encoding': 'gzip'
+    }
+
+    writer = ArchiveWriter(str(tmp_path))
+    writer.write('https://docs.example.com/page', 200, 'OK', headers, body)
+    writer.write('https://docs.example.com/other', 404, 'Not Found', {}, b'')
+    writer.close()
+
+    records = list(iter_records(str(tmp_path), latest_only=False))
+    assert [r['url'] for r in records] == ['https://docs.example.com/page', 'https://docs.example.com/other']
+
+    record = records[0]
+    assert record['status'] == 200
+    assert record['body'] == body
+    assert record['headers']['content-type'] == headers['Content-Type']
+    assert record['headers']['Last-Modified'] == headers['Last-Modified']
+    assert record['headers']['ETag'] == headers['ETag']
+    assert record['headers']['Content-Length'] == str(len(body))
+    assert 'Content-Encoding' not in record['headers']
+
+    assert records[1]['status'] == 404
+    assert records[1]['body'] == b''
+
+def test_writer_continues_after_highest_file(tmp_path):
+    for number in (1, 3):
+        open(tmp_path / f"{ARCHIVE_PREFIX}{number:05d}{ARCHIVE_SUFFIX}", 'wb').close()
+
+    writer = ArchiveWriter(str(tmp_path), max_bytes=1)
+    writer.write('https://docs.example.com/a', 200, 'OK', {}, b'a')
+    writer.write('https://docs.example.com/b', 200, 'OK', {}, b'b')
+    writer.close()
+
+    assert list_archive_files(str(tmp_path)) == [
+        f"{ARCHIVE_PREFIX}{number:05d}{ARCHIVE_SUFFIX}" for number in (1, 3, 4)
+    ]